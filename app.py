@@ -3,6 +3,9 @@ import pandas as pd
 import streamlit as st
 from xgboost import XGBClassifier
 
+from src.model_utils import expected_points, model_point_values
+from src.whatif import WhatIfEngine
+
 DATA_DIR = "data"
 MODEL_DIR = "models"
 
@@ -11,9 +14,12 @@ def load_csv(game_id: str, model_tag: str) -> pd.DataFrame:
     path = os.path.join(DATA_DIR, f"{model_tag}_{game_id}.csv")
     return pd.read_csv(path)
 
+def model_file(model_tag: str) -> str:
+    return os.path.join(MODEL_DIR, f"{model_tag}_xgb.json")
+
 @st.cache_resource
 def load_model(model_tag: str) -> XGBClassifier:
-    model_path = os.path.join(MODEL_DIR, f"{model_tag}_xgb.json")
+    model_path = model_file(model_tag)
     clf = XGBClassifier()
     if os.path.exists(model_path):
         clf.load_model(model_path)
@@ -21,6 +27,15 @@ def load_model(model_tag: str) -> XGBClassifier:
         st.warning(f"Model file {model_path} not found.")
     return clf
 
+@st.cache_resource
+def load_whatif(game_id: str, _model: XGBClassifier) -> WhatIfEngine:
+    """What-if engine over the same sequence model the page scores with."""
+    df = load_csv(game_id, "sequence")
+    points = model_point_values(_model, model_file("sequence"))
+    return WhatIfEngine(
+        _model, df, _model.get_booster().feature_names, points, game_id
+    )
+
 
 def heat_map(df: pd.DataFrame):
     import altair as alt
@@ -61,14 +76,20 @@ def main():
     st.write(row)
 
     if model.get_booster().feature_names:
-        features = pd.get_dummies(row.drop(columns=["points_scored"]), drop_first=True)
-        for col in model.get_booster().feature_names:
-            if col not in features.columns:
-                features[col] = 0
-        features = features[model.get_booster().feature_names]
-        probs = model.predict_proba(features)[0]
-        exp_pts = sum(p * i for i, p in enumerate(probs))
+        # full one-hot, then reindex: the training drop_first level is all-zero
+        features = pd.get_dummies(row.drop(columns=["points_scored"]), dtype=float)
+        features = features.reindex(
+            columns=model.get_booster().feature_names, fill_value=0.0
+        )
+        probs = model.predict_proba(features)
+        points = model_point_values(model, model_file(model_choice))
+        exp_pts = float(expected_points(probs, points)[0])
         st.metric("Expected points", f"{exp_pts:.2f}")
+
+        if model_choice == "sequence":
+            st.subheader("What if…")
+            table = load_whatif(game_id, model).scenario_table(poss)
+            st.dataframe(table.round(2))
     else:
         st.info("Model not loaded; predictions unavailable.")
 
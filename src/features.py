@@ -50,6 +50,53 @@ def shot_bucket(distance_ft: float) -> str:
     return "non_corner_three"
 
 
+def link_shots(
+    poss_df: pd.DataFrame, shot_df: pd.DataFrame, by: tuple = ("period",)
+) -> pd.DataFrame:
+    """
+    Attribute every shot to the possession whose event range contains it.
+
+    A possession owns the events after the previous possession's
+    ``last_event_num`` up to and including its own, so each shot is matched
+    forward (as-of join on ``event_num``) to the first possession in the same
+    ``by`` group that ends at or after it. Sorting dominates: O(n log n).
+    For a combined season table pass ``by=("game_id", "period")``.
+
+    Returns one row per shot with the owning ``poss_id`` (shots that fall
+    after the last possession of their group are dropped).
+    """
+    keys = list(by)
+    poss_ends = (
+        poss_df[keys + ["poss_id", "last_event_num"]]
+        .astype({"last_event_num": "int64"})
+        .sort_values("last_event_num", kind="mergesort")
+    )
+    # merge_asof needs identical ``by`` dtypes (empty shot lists load as object)
+    shots = shot_df.astype(
+        {"event_num": "int64", **poss_df[keys].dtypes.to_dict()}
+    ).sort_values("event_num", kind="mergesort")
+    linked = pd.merge_asof(
+        shots,
+        poss_ends,
+        left_on="event_num",
+        right_on="last_event_num",
+        by=keys,
+        direction="forward",
+    )
+    linked = linked.dropna(subset=["poss_id"]).drop(columns="last_event_num")
+    linked["poss_id"] = linked["poss_id"].astype(poss_df["poss_id"].dtype)
+    return linked.sort_values(keys + ["event_num"], kind="mergesort").reset_index(
+        drop=True
+    )
+
+
+def last_shot_per_possession(
+    linked: pd.DataFrame, by: tuple = ("period",)
+) -> pd.DataFrame:
+    """Keep only the final shot of each possession from ``link_shots`` output."""
+    return linked.drop_duplicates(subset=list(by) + ["poss_id"], keep="last")
+
+
 # ---------------- main -------------------------------------------------------
 
 
@@ -81,18 +128,17 @@ def build_baseline(game_id: str) -> str:
 
     # ---------------- shot location bucket ----------------------------------
     # link each possession to its last shot distance if a shot occurred
-    shot_df = pd.DataFrame(raw["shots"])[
-        ["event_num", "distance", "period"]
-    ].rename(columns={"distance": "shot_distance_ft"})
-
-    # use event_num max per possession_id to get the *last* shot
-    last_shots = (
-        poss_df[["poss_id", "last_event_num"]]
-        .merge(shot_df, left_on="last_event_num", right_on="event_num", how="left")
-        .set_index("poss_id")
+    shot_df = pd.DataFrame(
+        raw["shots"], columns=["event_num", "distance", "period"]
+    ).rename(columns={"distance": "shot_distance_ft"})
+
+    last_shots = last_shot_per_possession(link_shots(poss_df, shot_df))
+    poss_df = poss_df.merge(
+        last_shots[["period", "poss_id", "shot_distance_ft"]],
+        on=["period", "poss_id"],
+        how="left",
     )
 
-    poss_df["shot_distance_ft"] = last_shots["shot_distance_ft"]
     poss_df["shot_bucket"] = poss_df["shot_distance_ft"].apply(
         lambda d: shot_bucket(d) if pd.notna(d) else "no_shot"
     )
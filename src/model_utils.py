@@ -1,33 +1,62 @@
+import json
 import os
 import numpy as np
 import pandas as pd
-from xgboost import XGBClassifier
-from .train import load_csv, prep_xy
+from .train import load_csv, make_xgb, prep_xy
 
 
-def _fit(tag: str, game_id: str):
+def point_values(df: pd.DataFrame) -> list:
+    """Points represented by each model class (prep_xy label order)."""
+    return sorted(df["points_scored"].clip(0, 3).unique())
+
+
+def expected_points(proba: np.ndarray, categories) -> np.ndarray:
+    """EPV: class probabilities weighted by the points of each class."""
+    values = np.asarray(categories, dtype=float)
+    if proba.shape[-1] != len(values):
+        raise ValueError(
+            f"Model has {proba.shape[-1]} classes but {len(values)} point values."
+        )
+    return proba.dot(values)
+
+
+def _points_path(model_path: str) -> str:
+    return os.path.splitext(model_path)[0] + "_points.json"
+
+
+def save_model(model, categories, model_path: str) -> None:
+    """Save an XGBoost model with the points of each class alongside it."""
+    model.save_model(model_path)
+    with open(_points_path(model_path), "w") as f:
+        json.dump([float(c) for c in categories], f)
+
+
+def model_point_values(model, model_path: str) -> list:
+    """
+    Points of each class of a saved model, from its training labels: the
+    ``_points.json`` sidecar written by ``save_model`` if present, otherwise
+    the 0..k‑1 class codes (exact when the model saw every score 0..3).
+    """
+    path = _points_path(model_path)
+    if os.path.exists(path):
+        with open(path) as f:
+            return json.load(f)
+    return list(range(model.n_classes_))
+
+
+def fit_model(tag: str, game_id: str):
     """Return trained model, poss_ids, categories, and feature matrix."""
     df = load_csv(tag, game_id)
     X, y, num_cls = prep_xy(df)
-    categories = sorted(df["points_scored"].clip(0, 3).unique())
-    model = XGBClassifier(
-        objective="multi:softprob",
-        num_class=num_cls,
-        n_estimators=60,
-        max_depth=3,
-        learning_rate=0.2,
-        subsample=0.8,
-        eval_metric="mlogloss",
-        verbosity=0,
-    )
+    categories = point_values(df)
+    model = make_xgb(num_cls)
     model.fit(X, y)
     return model, df["poss_id"], categories, X
 
 
 def _epv_df(tag: str, game_id: str) -> pd.DataFrame:
-    model, poss_ids, cats, X = _fit(tag, game_id)
-    proba = model.predict_proba(X)
-    epv = proba.dot(np.array(cats))
+    model, poss_ids, cats, X = fit_model(tag, game_id)
+    epv = expected_points(model.predict_proba(X), cats)
     return pd.DataFrame({"poss_id": poss_ids, "epv": epv})
 
 
@@ -9,17 +9,24 @@ Train two XGBoost models:
 
 and report log‑loss + % improvement.
 
+With ``--bootstrap`` the memory‑k models (k = 0..3) are scored on one set of
+out‑of‑fold predictions and the log‑loss uplift over memory‑0 is bootstrapped
+over games to give confidence intervals.
+
 Usage
 -----
 python src/train.py 0022400001
 # (game_id argument is optional; defaults to 0022400001)
+python src/train.py --bootstrap 0022400001 0022400002 0022400003
 
 Requires: pandas, scikit‑learn, xgboost (already in requirements.txt)
 """
 import os, sys, json
+import numpy as np
 import pandas as pd
+from joblib import Parallel, delayed
 from sklearn.metrics import log_loss
-from sklearn.model_selection import train_test_split
+from sklearn.model_selection import GroupKFold, KFold, train_test_split
 from xgboost import XGBClassifier
 
 
@@ -57,12 +64,32 @@ def prep_xy(df: pd.DataFrame) -> tuple[pd.DataFrame, pd.Series]:
     return X, y_contig, num_cls
 
 
+# below this many rows there is no held‑out split; fits are scored in‑sample
+MIN_SPLIT_ROWS = 8
+
+
+def make_xgb(num_cls: int, random_state=None, n_jobs=None) -> XGBClassifier:
+    """The one XGBoost configuration used by every memory‑k model."""
+    return XGBClassifier(
+        objective="multi:softprob",
+        num_class=num_cls,
+        n_estimators=60,
+        max_depth=3,
+        learning_rate=0.2,
+        subsample=0.8,
+        eval_metric="mlogloss",
+        verbosity=0,
+        random_state=random_state,
+        n_jobs=n_jobs,
+    )
+
+
 def train_xgb(X, y, num_cls, seed=42):
     """
     Train / test split (25%).  If dataset too small, train & eval on same set.
     Returns log‑loss.
     """
-    if len(X) < 8:                       # tiny demo case
+    if len(X) < MIN_SPLIT_ROWS:          # tiny demo case
         X_train = X_test = X
         y_train = y_test = y
     else:
@@ -70,21 +97,205 @@ def train_xgb(X, y, num_cls, seed=42):
             X, y, test_size=0.25, random_state=seed
         )
 
-    clf = XGBClassifier(
-        objective="multi:softprob",
-        num_class=num_cls,
-        n_estimators=60,
-        max_depth=3,
-        learning_rate=0.2,
-        subsample=0.8,
-        eval_metric="mlogloss",
-        verbosity=0,
-    )
+    clf = make_xgb(num_cls)
     clf.fit(X_train, y_train)
     y_hat = clf.predict_proba(X_test)
     return log_loss(y_test, y_hat)
 
 
+# --------------------------------------------------------------------------- #
+#  bootstrap evaluation                                                       #
+# --------------------------------------------------------------------------- #
+
+MEMORY_DEPTHS = (0, 1, 2, 3)
+
+# sequence columns introduced at each memory depth (cumulative); tempo_sec is
+# the current possession's own duration, so every depth keeps it
+_MEMORY_COLS = {
+    1: ["prev_pts_1", "prev_bucket_1"],
+    2: ["prev_pts_2"],
+    3: ["prev_pts_3", "tempo_mean_last3", "streak_scored_last3"],
+}
+
+
+def memory_view(seq_df: pd.DataFrame, depth: int) -> pd.DataFrame:
+    """Restrict the sequence table to the features of a memory‑``depth`` model."""
+    drop = [c for k, cols in _MEMORY_COLS.items() if k > depth for c in cols]
+    return seq_df.drop(columns=[c for c in drop if c in seq_df.columns])
+
+
+def _oof_folds(y, num_cls, groups, n_splits=5, seed=42) -> list:
+    """
+    Train/test index pairs, grouped by game when possible.
+    Raises ValueError if a training fold lacks one of the ``num_cls`` classes.
+    """
+    n = len(y)
+    n_groups = len(np.unique(groups))
+    if n < MIN_SPLIT_ROWS:               # tiny demo case: in‑sample
+        folds = [(np.arange(n), np.arange(n))]
+    elif n_groups >= 2:
+        folds = GroupKFold(n_splits=min(n_splits, n_groups)).split(
+            np.zeros(n), y, groups
+        )
+    else:
+        folds = KFold(n_splits=n_splits, shuffle=True, random_state=seed).split(
+            np.zeros(n)
+        )
+
+    folds = list(folds)
+    for tr, _ in folds:
+        # an absent class would get p = 0 and cost -log(eps) per held‑out row
+        missing = np.setdiff1d(np.arange(num_cls), y[tr])
+        if len(missing):
+            raise ValueError(
+                f"Classes {missing.tolist()} absent from a training fold; "
+                "use fewer splits or more games."
+            )
+    return folds
+
+
+def _fit_fold(X, y, num_cls, tr, te, seed):
+    # one thread per model: the parallelism is across fits
+    clf = make_xgb(num_cls, random_state=seed, n_jobs=1)
+    clf.fit(X[tr], y[tr])
+    return clf.predict_proba(X[te])
+
+
+def oof_proba_many(
+    Xs: dict, y, num_cls, groups, n_splits=5, seed=42, n_jobs=-1
+) -> dict:
+    """
+    Out‑of‑fold class probabilities for several feature sets sharing ``y``
+    (e.g. one per memory depth).  Every (feature set, fold) fit is independent
+    and they all run in parallel; each row is predicted exactly once per
+    feature set by a model that never saw its game.
+    """
+    y = np.asarray(y)
+    folds = _oof_folds(y, num_cls, groups, n_splits=n_splits, seed=seed)
+    mats = {key: X.astype(float).to_numpy() for key, X in Xs.items()}
+
+    tasks = [(key, tr, te) for key in mats for tr, te in folds]
+    parts = Parallel(n_jobs=n_jobs, prefer="threads")(
+        delayed(_fit_fold)(mats[key], y, num_cls, tr, te, seed)
+        for key, tr, te in tasks
+    )
+
+    out = {key: np.zeros((len(y), num_cls)) for key in mats}
+    for (key, _, te), p in zip(tasks, parts):
+        out[key][te] = p
+    return out
+
+
+def oof_proba(X, y, num_cls, groups, n_splits=5, seed=42, n_jobs=-1) -> np.ndarray:
+    """Out‑of‑fold class probabilities for a single feature set."""
+    return oof_proba_many(
+        {0: X}, y, num_cls, groups, n_splits=n_splits, seed=seed, n_jobs=n_jobs
+    )[0]
+
+
+def row_logloss(proba: np.ndarray, y, eps: float = 1e-15) -> np.ndarray:
+    """Per‑row negative log‑likelihood of the true class."""
+    p = proba[np.arange(len(proba)), np.asarray(y)]
+    return -np.log(np.clip(p, eps, 1.0))
+
+
+def _boot_chunk(diff_sums, base_sums, counts, n_boot, seed):
+    """Mean log‑loss difference and baseline for ``n_boot`` resamples of units."""
+    rng = np.random.default_rng(seed)
+    n = len(counts)
+    w = rng.multinomial(n, np.full(n, 1.0 / n), size=n_boot).astype(float)
+    tot = w @ counts
+    return (w @ diff_sums.T) / tot[:, None], (w @ base_sums) / tot
+
+
+def bootstrap_uplift(
+    losses: dict, units, n_boot: int = 2000, alpha: float = 0.05,
+    seed: int = 42, chunk: int = 1000,
+) -> dict:
+    """
+    Bootstrap the mean log‑loss difference (memory‑0 minus memory‑k) over
+    resampling ``units`` (games).  ``losses`` maps depth → per‑row log‑loss.
+    Resamples are multinomial weights on per‑unit sums, drawn ``chunk`` at a
+    time to bound memory.
+    """
+    depths = [d for d in losses if d != 0]
+    codes, units = pd.factorize(pd.Series(units))
+    n_units = len(units)
+
+    counts = np.bincount(codes, minlength=n_units).astype(float)
+    base_sums = np.bincount(codes, weights=losses[0], minlength=n_units)
+    diff_sums = np.vstack([
+        base_sums - np.bincount(codes, weights=losses[d], minlength=n_units)
+        for d in depths
+    ])
+
+    n_chunks = max(1, -(-n_boot // chunk))
+    sizes = np.full(n_chunks, n_boot // n_chunks)
+    sizes[: n_boot % n_chunks] += 1
+    seeds = np.random.SeedSequence(seed).spawn(n_chunks)
+    parts = [
+        _boot_chunk(diff_sums, base_sums, counts, int(b), s)
+        for b, s in zip(sizes, seeds)
+    ]
+    boot_diff = np.vstack([p[0] for p in parts])
+    boot_pct = boot_diff / np.concatenate([p[1] for p in parts])[:, None] * 100
+
+    point = diff_sums.sum(axis=1) / counts.sum()
+    base_ll = base_sums.sum() / counts.sum()
+    lo, hi = 100 * alpha / 2, 100 * (1 - alpha / 2)
+    out = {}
+    for j, d in enumerate(depths):
+        out[f"memory_{d}"] = {
+            "logloss_diff": round(float(point[j]), 5),
+            "diff_ci": [round(float(v), 5) for v in np.percentile(boot_diff[:, j], [lo, hi])],
+            "improvement_%": round(float(point[j] / base_ll * 100), 2) if base_ll else 0.0,
+            "improvement_ci_%": [round(float(v), 2) for v in np.nanpercentile(boot_pct[:, j], [lo, hi])],
+            "p_no_gain": round(float((boot_diff[:, j] <= 0).mean()), 4),
+        }
+    return out
+
+
+def evaluate_bootstrap(
+    game_ids, n_boot: int = 2000, alpha: float = 0.05, seed: int = 42,
+    n_jobs: int = -1,
+):
+    """
+    Fit each memory depth once (out‑of‑fold, all depth × fold fits in
+    parallel), then bootstrap the uplift over games.  With a single game the
+    possessions are resampled instead.  Refuses data too small for
+    out‑of‑fold predictions, since in‑sample CIs would be meaningless.
+    """
+    seq_df = pd.concat(
+        [load_csv("sequence", gid).assign(game_id=gid) for gid in game_ids],
+        ignore_index=True,
+    )
+    games = seq_df.pop("game_id").to_numpy()
+    if len(seq_df) < MIN_SPLIT_ROWS:
+        raise ValueError(
+            f"{len(seq_df)} possessions is too few for out‑of‑fold predictions "
+            f"(need {MIN_SPLIT_ROWS}); bootstrap would only measure in‑sample fit."
+        )
+    units = games if len(game_ids) > 1 else np.arange(len(seq_df))
+
+    # labels depend only on points_scored, so y and k agree across depths
+    Xs = {}
+    for depth in MEMORY_DEPTHS:
+        Xs[depth], y, k = prep_xy(memory_view(seq_df, depth))
+    probas = oof_proba_many(Xs, y, k, games, seed=seed, n_jobs=n_jobs)
+    losses = {d: row_logloss(p, y) for d, p in probas.items()}
+
+    report = {
+        "games": len(game_ids),
+        "possessions": len(seq_df),
+        "resample_unit": "game" if len(game_ids) > 1 else "possession",
+        "n_boot": n_boot,
+        "memory_0_logloss": round(float(losses[0].mean()), 5),
+        **bootstrap_uplift(losses, units, n_boot=n_boot, alpha=alpha, seed=seed),
+    }
+    print(json.dumps(report, indent=2))
+    return report
+
+
 # --------------------------------------------------------------------------- #
 #  main driver                                                                #
 # --------------------------------------------------------------------------- #
@@ -113,5 +324,8 @@ def main(game_id: str = "0022400001"):
 
 
 if __name__ == "__main__":
-    gid = sys.argv[1] if len(sys.argv) > 1 else "0022400001"
-    main(gid)
+    args = sys.argv[1:]
+    if args and args[0] == "--bootstrap":
+        evaluate_bootstrap(args[1:] or ["0022400001"])
+    else:
+        main(args[0] if args else "0022400001")
@@ -0,0 +1,175 @@
+"""What-if EPV engine on top of the sequence (memory-3) model.
+
+Coaches ask questions like "what if the previous three possessions had been
+stops?".  A scenario is a mapping of sequence-feature overrides, e.g.
+``{"prev_pts_1": 0, "prev_pts_2": 0, "prev_pts_3": 0}``.  All uncached
+scenarios for a possession are applied to copies of its feature row, one-hot
+encoded into the model's feature space as a single matrix and scored with one
+``predict_proba`` call.  Results are cached per (game, possession, scenario)
+in a bounded, thread-safe LRU so one engine can serve every dashboard session.
+"""
+
+from __future__ import annotations
+
+import numbers
+import threading
+from collections import OrderedDict
+from typing import Any, Mapping
+
+import numpy as np
+import pandas as pd
+
+from .model_utils import expected_points, fit_model
+
+
+# columns a scenario may override; derived columns are recomputed
+SCENARIO_COLS = (
+    "prev_pts_1",
+    "prev_pts_2",
+    "prev_pts_3",
+    "prev_bucket_1",
+    "tempo_mean_last3",
+)
+CATEGORICAL_COLS = ("prev_bucket_1",)
+
+STOPS = {"prev_pts_1": 0, "prev_pts_2": 0, "prev_pts_3": 0}
+
+DEFAULT_SCENARIOS: dict[str, dict[str, Any]] = {
+    "as played": {},
+    "last 3 stops": STOPS,
+    "last 3 scored (2)": {"prev_pts_1": 2, "prev_pts_2": 2, "prev_pts_3": 2},
+    "last 3 threes": {"prev_pts_1": 3, "prev_pts_2": 3, "prev_pts_3": 3},
+    "last was stop": {"prev_pts_1": 0},
+    "fast tempo (10s)": {"tempo_mean_last3": 10.0},
+    "slow tempo (20s)": {"tempo_mean_last3": 20.0},
+}
+
+
+def scenario_key(overrides: Mapping[str, Any]) -> tuple:
+    """Canonical, hashable form of a scenario."""
+    return tuple(sorted(overrides.items()))
+
+
+class WhatIfEngine:
+    """Batch-evaluate counterfactual EPV for possessions of one game."""
+
+    def __init__(
+        self,
+        model: Any,
+        seq_df: pd.DataFrame,
+        feature_names: list[str],
+        categories: list,
+        game_id: str,
+        cache_size: int = 4096,
+    ):
+        self.model = model
+        self.game_id = game_id
+        self.feature_names = list(feature_names)
+        self.categories = list(categories)
+        # categorical levels the model was trained on; anything else would be
+        # silently encoded as the dropped drop_first level
+        self.levels = {
+            col: set(seq_df[col].dropna().unique())
+            for col in CATEGORICAL_COLS
+            if col in seq_df.columns
+        }
+        self._rows = seq_df.drop(columns=["points_scored"], errors="ignore")
+        self._rows = self._rows.drop(
+            columns=[c for c in self._rows.columns if c.endswith("_team_id")]
+        ).set_index("poss_id", drop=False)
+        self.cache_size = cache_size
+        self._cache: OrderedDict[tuple, float] = OrderedDict()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_game(cls, game_id: str) -> "WhatIfEngine":
+        """Fit the sequence model for ``game_id`` and wrap it."""
+        model, _, cats, X = fit_model("sequence", game_id)
+        seq_df = pd.read_csv(f"data/sequence_{game_id}.csv")
+        return cls(model, seq_df, list(X.columns), cats, game_id)
+
+    def default_scenarios(self) -> dict[str, dict[str, Any]]:
+        """DEFAULT_SCENARIOS plus one "last was <bucket>" per trained level."""
+        scenarios = dict(DEFAULT_SCENARIOS)
+        for level in sorted(self.levels.get("prev_bucket_1", ())):
+            if level != "none":
+                scenarios[f"last was {level}"] = {"prev_bucket_1": level}
+        return scenarios
+
+    def _validate(self, overrides: Mapping) -> None:
+        unknown = set(overrides) - set(SCENARIO_COLS)
+        if unknown:
+            raise KeyError(f"Unsupported scenario columns: {sorted(unknown)}")
+        for col, val in overrides.items():
+            if col in self.levels:
+                if not isinstance(val, str) or val not in self.levels[col]:
+                    raise ValueError(
+                        f"{col}={val!r} not seen in training; "
+                        f"expected one of {sorted(self.levels[col])}"
+                    )
+            elif not isinstance(val, numbers.Real) or isinstance(val, bool):
+                raise ValueError(f"{col}={val!r} must be a number")
+
+    # ------------------------------------------------------------------ #
+
+    def _design(self, poss_id: int, scenarios: list[Mapping]) -> pd.DataFrame:
+        """Perturbed copies of one possession row in the model's feature space."""
+        rows = self._rows.loc[[poss_id] * len(scenarios)].reset_index(drop=True)
+        for col in SCENARIO_COLS:
+            vals = [s.get(col) for s in scenarios]
+            mask = np.array([v is not None for v in vals])
+            if mask.any():
+                rows[col] = rows[col].astype(object)
+                rows.loc[mask, col] = [v for v in vals if v is not None]
+                if col != "prev_bucket_1":
+                    rows[col] = pd.to_numeric(rows[col])
+        if "streak_scored_last3" in rows.columns:
+            rows["streak_scored_last3"] = (
+                (rows["prev_pts_1"] > 0)
+                & (rows["prev_pts_2"] > 0)
+                & (rows["prev_pts_3"] > 0)
+            ).astype(int)
+
+        # full one-hot, then reindex: the training drop_first level is all-zero
+        X = pd.get_dummies(rows, dtype=float)
+        return X.reindex(columns=self.feature_names, fill_value=0.0).astype(float)
+
+    def evaluate(self, poss_id: int, scenarios: list[Mapping]) -> np.ndarray:
+        """EPV for each scenario at ``poss_id`` (one model call for cache misses)."""
+        for s in scenarios:
+            self._validate(s)
+
+        keys = [(self.game_id, poss_id, scenario_key(s)) for s in scenarios]
+        found, todo = {}, {}
+        with self._lock:
+            for k, s in zip(keys, scenarios):
+                if k in self._cache:
+                    self._cache.move_to_end(k)
+                    found[k] = self._cache[k]
+                elif k not in todo:
+                    todo[k] = s
+
+        if todo:
+            X = self._design(poss_id, list(todo.values()))
+            epv = expected_points(self.model.predict_proba(X), self.categories)
+            found.update(zip(todo.keys(), epv.tolist()))
+            with self._lock:
+                for k in todo:
+                    self._cache[k] = found[k]
+                    self._cache.move_to_end(k)
+                while len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+
+        return np.array([found[k] for k in keys])
+
+    def scenario_table(
+        self, poss_id: int, scenarios: Mapping[str, Mapping] | None = None
+    ) -> pd.DataFrame:
+        """Named scenarios with EPV and delta vs. the as-played possession."""
+        if scenarios is None:
+            scenarios = self.default_scenarios()
+        names = list(scenarios)
+        epv = self.evaluate(poss_id, [{}] + [scenarios[n] for n in names])
+        return pd.DataFrame(
+            {"scenario": names, "epv": epv[1:], "delta": epv[1:] - epv[0]}
+        )
@@ -1,3 +1,4 @@
+import json
 import os
 import pandas as pd
 from src import features
@@ -34,3 +35,44 @@ def test_build_baseline():
         'points_scored': [2, 0, 3],
     })
     pd.testing.assert_frame_equal(df.reset_index(drop=True), expected)
+
+
+def test_link_shots_period_aware_and_all_shots():
+    poss = pd.DataFrame({
+        'poss_id': [1, 2, 3],
+        'period': [1, 1, 2],
+        'last_event_num': [10, 20, 5],
+    })
+    shots = pd.DataFrame({
+        'event_num': [18, 4, 3, 12, 9],
+        'shot_distance_ft': [26.0, 2.0, 15.0, 8.0, 20.0],
+        'period': [1, 1, 2, 1, 1],
+    })
+    linked = features.link_shots(poss, shots)
+    assert list(linked['poss_id']) == [1, 1, 2, 2, 3]
+    assert list(linked['event_num']) == [4, 9, 12, 18, 3]
+
+    last = features.last_shot_per_possession(linked)
+    assert list(last['poss_id']) == [1, 2, 3]
+    assert list(last['shot_distance_ft']) == [20.0, 26.0, 15.0]
+
+
+def test_build_baseline_no_shots(tmp_path, monkeypatch):
+    with open('data/raw_0022400001.json') as f:
+        raw = json.load(f)
+    raw['shots'] = []
+    (tmp_path / 'data').mkdir()
+    with open(tmp_path / 'data' / 'raw_noshots.json', 'w') as f:
+        json.dump(raw, f)
+    monkeypatch.chdir(tmp_path)
+
+    df = pd.read_csv(features.build_baseline('noshots'))
+    assert list(df['shot_bucket']) == ['no_shot'] * 3
+
+
+def test_link_shots_float_period():
+    poss = pd.DataFrame({'poss_id': [1], 'period': [1], 'last_event_num': [10]})
+    shots = pd.DataFrame({
+        'event_num': [4], 'shot_distance_ft': [2.0], 'period': [1.0],
+    })
+    assert list(features.link_shots(poss, shots)['poss_id']) == [1]
@@ -1,3 +1,6 @@
+import pytest
+import numpy as np
+import pandas as pd
 from src import train
 from src import features
 from src import sequence_features
@@ -10,3 +13,63 @@ def test_train_runs():
 
     # Should run without raising
     train.main("0022400001")
+
+
+def test_memory_view_drops_deeper_columns():
+    seq_df = pd.read_csv(
+        sequence_features.add_sequence_feats("0022400001")
+    )
+    m0 = train.memory_view(seq_df, 0)
+    m2 = train.memory_view(seq_df, 2)
+    assert "prev_pts_1" not in m0.columns
+    assert "tempo_sec" in m0.columns
+    assert {"prev_pts_1", "prev_pts_2"} <= set(m2.columns)
+    assert "prev_pts_3" not in m2.columns
+    assert list(train.memory_view(seq_df, 3).columns) == list(seq_df.columns)
+
+
+def test_oof_proba_grouped_folds():
+    X = pd.DataFrame({"a": np.arange(20.0)})
+    y = np.tile([0, 1, 2, 0, 1], 4)
+    groups = np.repeat([0, 1, 2, 3], 5)
+    proba = train.oof_proba(X, y, 3, groups, n_splits=4)
+    assert proba.shape == (20, 3)
+    np.testing.assert_allclose(proba.sum(axis=1), 1.0, rtol=1e-5)
+
+
+def test_oof_proba_rejects_missing_class_in_fold():
+    X = pd.DataFrame({"a": np.arange(20.0)})
+    y = np.array([0] * 10 + [1] * 8 + [2] * 2)   # class 2 lives in one game
+    groups = np.repeat([0, 1, 2, 3], 5)
+    with pytest.raises(ValueError):
+        train.oof_proba(X, y, 3, groups, n_splits=4)
+
+
+def test_bootstrap_uplift_ci():
+    rng = np.random.default_rng(0)
+    units = np.repeat(np.arange(50), 20)
+    base = rng.random(1000) + 0.5
+    losses = {0: base, 3: base - 0.1, 1: base.copy()}
+    out = train.bootstrap_uplift(losses, units, n_boot=1000, chunk=300)
+    lo, hi = out["memory_3"]["diff_ci"]
+    assert lo <= 0.1 <= hi and lo > 0
+    assert out["memory_3"]["p_no_gain"] == 0.0
+    assert out["memory_1"]["diff_ci"] == [0.0, 0.0]
+
+
+def test_oof_proba_many_parallel_matches_serial():
+    rng = np.random.default_rng(0)
+    Xs = {d: pd.DataFrame(rng.random((40, d + 1))) for d in (0, 1)}
+    y = np.tile([0, 1, 2, 0], 10)
+    groups = np.repeat(np.arange(8), 5)
+    serial = train.oof_proba_many(Xs, y, 3, groups, n_splits=4, n_jobs=1)
+    parallel = train.oof_proba_many(Xs, y, 3, groups, n_splits=4, n_jobs=2)
+    for d in Xs:
+        np.testing.assert_allclose(serial[d], parallel[d])
+        np.testing.assert_allclose(serial[d].sum(axis=1), 1.0, rtol=1e-5)
+
+
+def test_bootstrap_refuses_in_sample():
+    sequence_features.add_sequence_feats("0022400001")    # 3 possessions
+    with pytest.raises(ValueError, match="out‑of‑fold"):
+        train.evaluate_bootstrap(["0022400001"], n_boot=10)
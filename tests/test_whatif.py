@@ -0,0 +1,140 @@
+import pytest
+import numpy as np
+import pandas as pd
+from src import whatif
+
+
+class FakeModel:
+    """Scores P(score) from prev_pts_1; counts predict_proba calls."""
+
+    def __init__(self):
+        self.calls = 0
+        self.columns = None
+
+    def predict_proba(self, X):
+        self.calls += 1
+        self.columns = list(X.columns)
+        p = np.clip(0.1 + 0.1 * X["prev_pts_1"].to_numpy(), 0, 1)
+        return np.column_stack([1 - p, p])
+
+
+def make_engine():
+    seq_df = pd.DataFrame({
+        'poss_id': [1, 2],
+        'offense_team_id': [10, 20],
+        'prev_pts_1': [0, 2],
+        'prev_pts_2': [0, 2],
+        'prev_pts_3': [0, 2],
+        'prev_bucket_1': ['none', 'paint'],
+        'tempo_mean_last3': [np.nan, 20.0],
+        'streak_scored_last3': [0, 1],
+        'points_scored': [2, 0],
+    })
+    features = ['poss_id', 'prev_pts_1', 'prev_pts_2', 'prev_pts_3',
+                'tempo_mean_last3', 'streak_scored_last3', 'prev_bucket_1_paint']
+    model = FakeModel()
+    return whatif.WhatIfEngine(model, seq_df, features, [0, 2], '0022400001'), model
+
+
+def test_evaluate_batches_and_caches():
+    engine, model = make_engine()
+    scenarios = [{}, whatif.STOPS, {'prev_pts_1': 3}]
+    epv = engine.evaluate(2, scenarios)
+    np.testing.assert_allclose(epv, [0.6, 0.2, 0.8])
+    assert model.calls == 1
+    assert model.columns == engine.feature_names
+
+    # repeated and reordered scenarios hit the cache
+    engine.evaluate(2, [{'prev_pts_1': 3}, whatif.STOPS])
+    assert model.calls == 1
+    engine.evaluate(1, [{}])
+    assert model.calls == 2
+
+
+def test_design_recomputes_streak_and_encodes_bucket():
+    engine, _ = make_engine()
+    X = engine._design(1, [{}, {'prev_pts_1': 2, 'prev_pts_2': 2, 'prev_pts_3': 2,
+                                'prev_bucket_1': 'paint'}])
+    assert list(X['streak_scored_last3']) == [0, 1]
+    assert list(X['prev_bucket_1_paint']) == [0.0, 1.0]
+
+
+def test_scenario_table_delta():
+    engine, _ = make_engine()
+    table = engine.scenario_table(2, {'stops': whatif.STOPS})
+    assert list(table['scenario']) == ['stops']
+    assert round(table.loc[0, 'delta'], 6) == -0.4
+
+
+def test_unknown_bucket_raises():
+    engine, model = make_engine()
+    for bad in ('restricted_area', 'typo'):
+        with pytest.raises(ValueError):
+            engine.evaluate(2, [{'prev_bucket_1': bad}])
+    assert model.calls == 0
+
+
+def test_unhashable_value_raises():
+    engine, _ = make_engine()
+    with pytest.raises(ValueError):
+        engine.evaluate(2, [{'prev_pts_1': [0, 2]}])
+    with pytest.raises(KeyError):
+        engine.evaluate(2, [{'points_scored': 0}])
+
+
+def test_default_scenarios_use_trained_levels():
+    engine, _ = make_engine()
+    scenarios = engine.default_scenarios()
+    assert scenarios['last was paint'] == {'prev_bucket_1': 'paint'}
+    assert not any('restricted_area' in name for name in scenarios)
+    engine.scenario_table(2)
+
+
+def test_cache_is_bounded_lru():
+    engine, model = make_engine()
+    engine.cache_size = 2
+    engine.evaluate(2, [{'prev_pts_1': 0}, {'prev_pts_1': 2}])
+    engine.evaluate(2, [{'prev_pts_1': 0}])      # refresh, now most recent
+    engine.evaluate(2, [{'prev_pts_1': 3}])      # evicts prev_pts_1=2
+    assert len(engine._cache) == 2
+    calls = model.calls
+    engine.evaluate(2, [{'prev_pts_1': 0}])
+    assert model.calls == calls
+    engine.evaluate(2, [{'prev_pts_1': 2}])
+    assert model.calls == calls + 1
+
+
+def test_class_values_come_from_model_not_game(tmp_path):
+    from xgboost import XGBClassifier
+    from src import model_utils, train
+
+    seq_df = pd.read_csv('data/sequence_0022400001.csv')
+    assert sorted(seq_df['points_scored'].unique()) == [0, 2, 3]
+
+    # season-style model that also saw 1-point possessions
+    X, _, _ = train.prep_xy(seq_df)
+    X2 = pd.concat([X, X], ignore_index=True)
+    m = train.make_xgb(4)
+    m.fit(X2, [0, 1, 2, 3, 0, 1])
+    path = str(tmp_path / 'sequence_xgb.json')
+
+    m.save_model(path)
+    loaded = XGBClassifier()
+    loaded.load_model(path)
+    assert model_utils.model_point_values(loaded, path) == [0, 1, 2, 3]
+
+    # sidecar wins over class codes: a {0, 2, 3} model is not worth 0/1/2
+    m3 = train.make_xgb(3)
+    m3.fit(X2, [0, 1, 2, 0, 1, 2])
+    path3 = str(tmp_path / 'three_xgb.json')
+    model_utils.save_model(m3, [0, 2, 3], path3)
+    assert model_utils.model_point_values(m3, path3) == [0, 2, 3]
+
+    points = model_utils.model_point_values(loaded, path)
+
+    engine = whatif.WhatIfEngine(
+        loaded, seq_df, loaded.get_booster().feature_names, points, 'g'
+    )
+    epv = engine.evaluate(3, [{}])
+    proba = loaded.predict_proba(engine._design(3, [{}]))
+    np.testing.assert_allclose(epv, proba.dot([0, 1, 2, 3]))